@@ -1,18 +1,73 @@
 # dataset_merger.py
+import io
+import os
+
+import orjson
+import zstandard as zstd
+
+from reddit_scraper import ZSTD_LEVEL
+
 files = [
     "dataset_soccer_top_all_250.jsonl",
     "dataset_soccer_top_year_250.jsonl",
     "dataset_soccercirclejerk_top_all_250.jsonl",
     "dataset_soccercirclejerk_top_month_250.jsonl",
     "dataset_soccercirclejerk_top_year_250.jsonl",
-]  # list of files to merge
+]  # list of files to merge; a missing one is read from its .zst (reddit_scraper.py --zstd)
+
+# zstd-compressed: downstream loaders read it faster than the raw text; drop the .zst
+# suffix for plain JSONL
+output_file = "merged_datasets.jsonl.zst"
+
+# the time filters overlap (top_month within top_year within top_all), so the same
+# submission shows up in several files; keep only its first occurrence
+seen_ids = set()
+duplicates = 0
+unreadable = 0
 
-output_file = "merged_datasets.jsonl"
+raw_outfile = open(output_file, "wb")
+if output_file.endswith(".zst"):
+    outfile = zstd.ZstdCompressor(level=ZSTD_LEVEL, threads=-1).stream_writer(
+        raw_outfile
+    )
+else:
+    outfile = raw_outfile
 
-with open(output_file, "w", encoding="utf-8") as outfile:
+# binary mode: lines are streamed straight through, no utf-8 decode/encode round trip
+with outfile:
     for fname in files:
-        with open(fname, "r", encoding="utf-8") as infile:
-            outfile.write(infile.read())
-            outfile.write("\n")  # optional: add newline between files
+        if not os.path.exists(fname) and os.path.exists(fname + ".zst"):
+            fname += ".zst"
+        with open(fname, "rb") as infile:
+            lines = infile
+            if fname.endswith(".zst"):
+                lines = io.BufferedReader(
+                    zstd.ZstdDecompressor().stream_reader(
+                        infile, read_across_frames=True
+                    )
+                )
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    post_id = orjson.loads(line)["id"]
+                except (orjson.JSONDecodeError, KeyError, TypeError):
+                    # e.g. a last line cut short by a crashed scrape; skip it like the
+                    # scraper's resume does
+                    print(f"Skipping unreadable line in {fname}")
+                    unreadable += 1
+                    continue
+                if post_id in seen_ids:
+                    duplicates += 1
+                    continue
+                seen_ids.add(post_id)
+                outfile.write(line)
+                # the last record of a file may lack its newline; never emit blank lines
+                if not line.endswith(b"\n"):
+                    outfile.write(b"\n")
 
-print(f"Merged {len(files)} files into {output_file}")
+print(
+    f"Merged {len(files)} files into {output_file} "
+    f"({len(seen_ids)} submissions, {duplicates} duplicates dropped, "
+    f"{unreadable} unreadable lines skipped)"
+)
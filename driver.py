@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+driver.py
+Runs one reddit_scraper.scrape_subreddit job per (subreddit, time_filter) slice in
+parallel worker processes. Each worker authenticates with its own credential set
+(REDDIT_CLIENT_ID_1/REDDIT_CLIENT_SECRET_1 .. _N in env or .env). Reddit rate-limits
+per OAuth client, so each credential set gets its own cross-process rate limiter
+(--rate) and throughput scales with the number of sets; --ip_rate optionally adds
+one ceiling shared by all of them.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+import multiprocessing
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Tuple
+
+from reddit_scraper import (
+    scrape_subreddit,
+    PacedRequestor,
+    REDDIT_CLIENT_ID,
+    REDDIT_CLIENT_SECRET,
+)
+
+logger = logging.getLogger("reddit_scraper.driver")
+
+# (subreddit, time_filter) slices that make up the dataset merged by dataset_merger.py
+DEFAULT_SLICES = [
+    ("soccer", "all"),
+    ("soccer", "year"),
+    ("soccercirclejerk", "all"),
+    ("soccercirclejerk", "month"),
+    ("soccercirclejerk", "year"),
+]
+
+
+class SharedRateLimiter:
+    """Cross-process limiter that spaces requests evenly to stay under a per-minute cap.
+
+    State lives in a multiprocessing.Manager so the instance can be handed to pool
+    workers; each call reserves the next free slot and returns how long to wait for it.
+    """
+
+    def __init__(self, manager, requests_per_minute: int = 60):
+        self._lock = manager.Lock()
+        self._next_slot = manager.Value("d", 0.0)
+        self._interval = 60.0 / requests_per_minute
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self._interval
+        return slot - now
+
+
+class RateLimitedRequestor(PacedRequestor):
+    """PacedRequestor that also waits for a slot on every given SharedRateLimiter."""
+
+    def __init__(self, *args, rate_limiters: List[SharedRateLimiter], **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rate_limiters = rate_limiters
+
+    @asynccontextmanager
+    async def request(self, *args, **kwargs):
+        await asyncio.sleep(max(limiter.reserve() for limiter in self._rate_limiters))
+        async with super().request(*args, **kwargs) as response:
+            yield response
+
+
+def load_credentials() -> List[Tuple[str, str]]:
+    """Read numbered credential sets, falling back to the single REDDIT_CLIENT_ID pair."""
+    credentials = []
+    i = 1
+    while os.getenv(f"REDDIT_CLIENT_ID_{i}"):
+        client_id = os.getenv(f"REDDIT_CLIENT_ID_{i}")
+        client_secret = os.getenv(f"REDDIT_CLIENT_SECRET_{i}")
+        if not client_secret:
+            raise RuntimeError(
+                f"REDDIT_CLIENT_SECRET_{i} is missing for REDDIT_CLIENT_ID_{i}"
+            )
+        credentials.append((client_id, client_secret))
+        i += 1
+    if not credentials and REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET:
+        credentials.append((REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET))
+    if not credentials:
+        raise RuntimeError("Missing Reddit credentials in environment.")
+    return credentials
+
+
+def run_slice(job: Dict[str, Any]) -> Tuple[str, bool]:
+    """Pool worker: scrape one (subreddit, time_filter) slice.
+
+    Returns (label, succeeded). Errors are logged here rather than raised, since an
+    exception reaching the pool would tear down the other slices mid-scrape.
+    """
+    label = f"r/{job['subreddit_name']} {job['time_filter']}"
+    client_id, client_secret = job.pop("credentials")
+    rate_limiters = job.pop("rate_limiters")
+    try:
+        asyncio.run(
+            scrape_subreddit(
+                **job,
+                reddit_kwargs={
+                    "client_id": client_id,
+                    "client_secret": client_secret,
+                    "requestor_class": RateLimitedRequestor,
+                    "requestor_kwargs": {"rate_limiters": rate_limiters},
+                },
+            )
+        )
+    except Exception as e:
+        logger.exception(f"Slice {label} failed: {e}")
+        return label, False
+    return label, True
+
+
+def main():
+    # -h / --help text
+    parser = argparse.ArgumentParser(
+        description="Scrape several subreddit/time-filter slices in parallel processes."
+    )
+    parser.add_argument(
+        "--limit",
+        "-l",
+        type=int,
+        default=250,
+        help="Number of submissions to fetch per slice",
+    )
+    parser.add_argument(
+        "--top_comments",
+        "-c",
+        type=int,
+        default=10,
+        help="Top N comments to include per submission",
+    )
+    parser.add_argument(
+        "--output_prefix", "-o", default="dataset", help="Output filename prefix"
+    )
+    parser.add_argument(
+        "--rate",
+        type=int,
+        default=100,
+        help="Requests per minute per credential set, shared by every worker using it "
+        "(Reddit allows 100 per OAuth client)",
+    )
+    parser.add_argument(
+        "--ip_rate",
+        type=int,
+        default=None,
+        help="Optional requests per minute ceiling across all credential sets",
+    )
+    parser.add_argument(
+        "--zstd",
+        action="store_true",
+        help="Write the JSONL outputs zstd-compressed (.jsonl.zst)",
+    )
+    args = parser.parse_args()
+
+    credentials = load_credentials()
+    with multiprocessing.Manager() as manager:
+        # one limiter per credential set, since Reddit's quota is per OAuth client
+        credential_limiters = [
+            SharedRateLimiter(manager, requests_per_minute=args.rate)
+            for _ in credentials
+        ]
+        ip_limiters = []
+        if args.ip_rate:
+            ip_limiters.append(
+                SharedRateLimiter(manager, requests_per_minute=args.ip_rate)
+            )
+        jobs = [
+            {
+                "subreddit_name": subreddit_name,
+                "sort": "top",
+                "time_filter": time_filter,
+                "limit": args.limit,
+                "top_comments": args.top_comments,
+                "output_prefix": args.output_prefix,
+                "compress": args.zstd,
+                # round-robin credential sets over slices
+                "credentials": credentials[i % len(credentials)],
+                "rate_limiters": [credential_limiters[i % len(credentials)]]
+                + ip_limiters,
+            }
+            for i, (subreddit_name, time_filter) in enumerate(DEFAULT_SLICES)
+        ]
+        logger.info(
+            f"Running {len(jobs)} slices on {len(credentials)} credential set(s) at {args.rate} req/min each"
+            + (f", {args.ip_rate} req/min overall" if args.ip_rate else "")
+        )
+        # every slice gets its own process; slices sharing a credential set also share
+        # its limiter, so they overlap without exceeding that set's quota
+        with multiprocessing.Pool(processes=len(jobs)) as pool:
+            failed = []
+            for label, succeeded in pool.imap_unordered(run_slice, jobs):
+                if succeeded:
+                    logger.info(f"Finished {label}")
+                else:
+                    failed.append(label)
+
+    if failed:
+        logger.error(f"{len(failed)} of {len(jobs)} slices failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+pushshift.py
+Harvests submission ids for a subreddit over an arbitrary date range from PullPush,
+a Pushshift-compatible archive. Reddit's own listings can't be queried by creation
+time and stop after ~1000 entries; the ids found here are then looked up through
+reddit.info() (100 per request) for live scores and comments.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional
+
+import aiohttp
+
+logger = logging.getLogger("reddit_scraper.pushshift")
+
+PULLPUSH_SUBMISSION_URL = "https://api.pullpush.io/reddit/search/submission/"
+PAGE_SIZE = 100  # PullPush's maximum page size
+PAGE_DELAY = 1.0  # seconds between pages, to stay polite to a free community service
+MAX_RETRIES = 5  # per page, for 429 / 5xx answers and transport failures
+RETRY_BACKOFF = 2.0  # seconds, doubled on every retry unless Retry-After says otherwise
+# per page; aiohttp's default total timeout is 5 minutes
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30)
+# connection resets / DNS errors, timeouts, and HTML error pages served instead of JSON
+RETRYABLE_ERRORS = (
+    aiohttp.ClientConnectionError,
+    aiohttp.ContentTypeError,
+    asyncio.TimeoutError,
+)
+
+
+async def fetch_page(session: aiohttp.ClientSession, params: dict) -> list:
+    """GET one page of results, retrying rate-limit, server and transport errors with backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        last_attempt = attempt == MAX_RETRIES
+        delay = RETRY_BACKOFF * 2**attempt
+        try:
+            async with session.get(PULLPUSH_SUBMISSION_URL, params=params) as response:
+                retryable = response.status == 429 or response.status >= 500
+                if not retryable or last_attempt:
+                    response.raise_for_status()
+                    return (await response.json())["data"]
+                retry_after = response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = float(retry_after)
+                reason = f"answered {response.status}"
+        except RETRYABLE_ERRORS as e:
+            if last_attempt:
+                raise
+            reason = f"request failed ({type(e).__name__}: {e})"
+        logger.warning(
+            f"PullPush {reason}, retrying in {delay:.0f}s ({attempt + 1}/{MAX_RETRIES})"
+        )
+        await asyncio.sleep(delay)
+
+
+async def fetch_submission_ids(
+    subreddit: str,
+    after: int,
+    before: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> List[str]:
+    """Return ids of submissions created in (after, before), newest first.
+
+    Pages backwards through time by created_utc. `before` is exclusive, so each page
+    asks for before=oldest + 1: posts sharing the oldest timestamp that didn't fit on
+    the previous page come back, and the ids already seen are dropped.
+    """
+    ids = []
+    seen = set()
+    cursor = before
+    async with aiohttp.ClientSession(timeout=REQUEST_TIMEOUT) as session:
+        while limit is None or len(ids) < limit:
+            params = {
+                "subreddit": subreddit,
+                "after": after,
+                "size": PAGE_SIZE,
+                "sort": "desc",
+                "sort_type": "created_utc",
+            }
+            if cursor is not None:
+                params["before"] = cursor
+            page = await fetch_page(session, params)
+            if not page:
+                break
+
+            new_ids = 0
+            for submission in page:
+                if submission["id"] not in seen:
+                    seen.add(submission["id"])
+                    ids.append(submission["id"])
+                    new_ids += 1
+            logger.info(f"PullPush r/{subreddit}: {len(ids)} ids so far")
+
+            if len(page) < PAGE_SIZE:
+                # a short page means nothing older is left
+                break
+            oldest = min(int(submission["created_utc"]) for submission in page)
+            if new_ids:
+                cursor = oldest + 1
+            else:
+                # a whole page of one timestamp, all seen; step past it rather than loop forever
+                cursor = oldest
+            if oldest <= after:
+                break
+            await asyncio.sleep(PAGE_DELAY)
+
+    return ids if limit is None else ids[:limit]
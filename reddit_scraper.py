@@ -1,23 +1,37 @@
 #!/usr/bin/env python3
 """
 reddit_scraper.py
-Scrapes submissions and top comments from a subreddit using PRAW.
-Outputs JSONL (one JSON per submission) and CSV.
+Scrapes submissions and top comments from a subreddit using Async PRAW.
+Comment trees for many submissions are fetched concurrently on one event loop.
+With --after/--before, submissions come from a date range harvested via PullPush
+(pushshift.py) instead of a sort/time_filter listing.
+Outputs JSONL (one JSON per submission, optionally zstd-compressed) and CSV.
 """
 
 import os
 import time
-import json
+import asyncio
+import csv
+import functools
+import heapq
+import io
 import re
 import argparse
 import logging
-from typing import List, Dict, Any
+import operator
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
 from tqdm import tqdm
 
-import praw
-import pandas as pd
+import asyncpraw
+import asyncprawcore
+import orjson
+import zstandard as zstd
 from dotenv import load_dotenv
-from praw.models import MoreComments
+from asyncpraw.models import MoreComments
+
+import pushshift
 
 # Load .env if present
 load_dotenv()
@@ -39,41 +53,150 @@ if not (REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET):
     # but inform the user
 
 
+# CSV columns, in output order (rows are written as tuples in this same order)
+CSV_FIELDS = [
+    "id",
+    "title",
+    "selftext",
+    "top_comments",
+    "score",
+    "num_comments",
+    "created_utc",
+    "permalink",
+]
+
+
+# submission attributes copied into each JSONL record, fetched in one attrgetter call
+POST_FIELDS = (
+    "id",
+    "title",
+    "selftext",
+    "score",
+    "created_utc",
+    "num_comments",
+    "permalink",
+)
+get_post_fields = operator.attrgetter(*POST_FIELDS)
+
+# zstd level for --zstd JSONL output: cheap to encode, still ~4-6x smaller on text
+ZSTD_LEVEL = 3
+
+# str.translate table dropping CR/LF, used to keep each CSV field on one line
+STRIP_NEWLINES = str.maketrans("", "", "\r\n")
+
+
 # Utility: redact usernames / urls to avoid storing PII
 USERNAME_RE = re.compile(r"(?:u/|/u/)?[A-Za-z0-9_-]{3,}")
 URL_RE = re.compile(r"(https?://\S+)")
 EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+# '[deleted]' / '[removed]' placeholders, stripped in one pass
+PLACEHOLDER_RE = re.compile(r"\[(?:deleted|removed)\]")
 
 
 def redact_text(text: str) -> str:
     if not text:
         return ""
     # remove common 'deleted' placeholders
-    text = text.replace("[deleted]", "").replace("[removed]", "")
-    return text.strip()
-
-
-def init_reddit_creds():
-    if not (REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET):
+    return PLACEHOLDER_RE.sub("", text).strip()
+
+
+# titles repeat across sort/time_filter listings, bodies almost never do, so only titles
+# go through the cache; it's bounded so long runs stay flat
+redact_title = functools.lru_cache(maxsize=8192)(redact_text)
+
+
+class RateLimitPacer:
+    """Spaces requests from x-ratelimit-remaining / x-ratelimit-reset response headers.
+
+    prawcore's own limiter only delays the next call, so concurrent comment fetches
+    all pass it together; here each request reserves its own slot. While the quota
+    allows >= 1 req/sec no delay is added, below that requests are spread evenly
+    over what's left of the window instead of running into 429s.
+    """
+
+    def __init__(self):
+        self._next_slot = 0.0
+        self._interval = 0.0
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        return slot - now
+
+    def update(self, headers) -> None:
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        if remaining is None or reset is None:
+            return
+        remaining, reset = float(remaining), float(reset)
+        if remaining < 1:
+            # quota exhausted: hold everything until the window resets
+            self._next_slot = time.monotonic() + reset
+            self._interval = 0.0
+        elif remaining < reset:
+            self._interval = reset / remaining
+        else:
+            self._interval = 0.0
+
+
+class PacedRequestor(asyncprawcore.Requestor):
+    """Requestor that paces every HTTP request with a RateLimitPacer."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pacer = RateLimitPacer()
+
+    @asynccontextmanager
+    async def request(self, *args, **kwargs):
+        delay = self._pacer.reserve()
+        if delay > 0:
+            logger.debug(f"Rate limit pacing: sleeping {delay:.2f}s")
+            await asyncio.sleep(delay)
+        async with super().request(*args, **kwargs) as response:
+            self._pacer.update(response.headers)
+            yield response
+
+
+def init_reddit_creds(
+    client_id: Optional[str] = None,
+    client_secret: Optional[str] = None,
+    **reddit_kwargs,
+):
+    # explicit credentials (e.g. one set per driver.py worker) win over the env ones
+    client_id = client_id or REDDIT_CLIENT_ID
+    client_secret = client_secret or REDDIT_CLIENT_SECRET
+    if not (client_id and client_secret):
         raise RuntimeError("Missing Reddit credentials in environment.")
-    reddit = praw.Reddit(
-        client_id=REDDIT_CLIENT_ID,
-        client_secret=REDDIT_CLIENT_SECRET,
+    reddit_kwargs.setdefault("requestor_class", PacedRequestor)
+    reddit = asyncpraw.Reddit(
+        client_id=client_id,
+        client_secret=client_secret,
         user_agent=REDDIT_USER_AGENT,
+        **reddit_kwargs,
     )
     return reddit
 
 
-def extract_top_comments(post, top_n=5) -> List[Dict[str, Any]]:
+async def extract_top_comments(post, top_n=5) -> List[Dict[str, Any]]:
     """Return top_n top-level comments by score. Skip removed/deleted bodies."""
-    try:
-        post.comments.replace_more(limit=0)
-    except Exception as e:
-        logger.warning(f"replace_more failed for {post.id}: {e}")
+    # have reddit rank the tree by score, so the first usable top-level comments are the top_n;
+    # must be set before the comments are fetched
+    post.comment_sort = "top"
+    # only top-level comments are used, so don't have reddit send the reply threads
+    post.add_fetch_param("depth", 1)
+    # listing submissions arrive without their comment tree, load() fetches it
+    await post.load()
+    # no replace_more: MoreComments stubs are skipped below, and with the tree already
+    # ranked there is nothing further down worth an extra request
     comments = []
     for c in post.comments:
         if isinstance(c, MoreComments):
             continue
+        # reddit puts stickied (mod / AutoModerator) comments first whatever the sort,
+        # so they'd take a top_n slot before the break below regardless of score
+        if getattr(c, "stickied", False):
+            continue
         body = getattr(c, "body", None)
         if not body:
             continue
@@ -88,16 +211,112 @@ def extract_top_comments(post, top_n=5) -> List[Dict[str, Any]]:
                 "is_submitter": getattr(c, "is_submitter", False),
             }
         )
-    # sort by score desc
-    comments = sorted(
+        if len(comments) >= top_n:
+            break
+    # at most top_n items here; this only re-sorts them by the scores we read, in case
+    # reddit's ranking (vote fuzzing, ties) disagrees slightly
+    return heapq.nlargest(
+        top_n,
         comments,
         key=lambda x: (x["score"] if x["score"] is not None else 0),
-        reverse=True,
     )
-    return comments[:top_n]
 
 
-def scrape_subreddit(
+def open_jsonl_writer(path: str, append: bool = False):
+    """Open a binary JSONL output; paths ending in .zst are written through zstd."""
+    f = open(path, "ab" if append else "wb")
+    if not path.endswith(".zst"):
+        return f
+    # appending starts a new zstd frame; readers decode concatenated frames as one stream
+    return zstd.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(f)
+
+
+def add_record_id(seen_ids: set, line: bytes, path: str) -> None:
+    if not line.strip():
+        return
+    try:
+        seen_ids.add(orjson.loads(line)["id"])
+    except (orjson.JSONDecodeError, KeyError, TypeError):
+        logger.warning(f"Skipping unreadable line in {path}")
+
+
+def load_seen_ids(path: str) -> set:
+    """Return the submission ids already written to an existing JSONL output.
+
+    A last line cut short by a crash is truncated away so appended records start on
+    a fresh line; that submission simply gets scraped again.
+    """
+    if path.endswith(".zst"):
+        return load_seen_ids_zst(path)
+    seen_ids = set()
+    complete_bytes = 0
+    with open(path, "r+b") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            complete_bytes += len(line)
+            add_record_id(seen_ids, line, path)
+        if f.seek(0, os.SEEK_END) != complete_bytes:
+            logger.warning(f"Dropping partial last line in {path}")
+            f.truncate(complete_bytes)
+    return seen_ids
+
+
+def load_seen_ids_zst(path: str) -> set:
+    """load_seen_ids for zstd output.
+
+    A crashed run leaves its zstd frame unterminated, and frames appended after it
+    would not decode, so the complete records are re-encoded into a fresh file.
+    """
+    seen_ids = set()
+    tmp_path = path + ".tmp"
+    cctx = zstd.ZstdCompressor(level=ZSTD_LEVEL)
+    with open(path, "rb") as f, cctx.stream_writer(open(tmp_path, "wb")) as out:
+        lines = io.BufferedReader(
+            zstd.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        )
+        try:
+            for line in lines:
+                if not line.endswith(b"\n"):
+                    logger.warning(f"Dropping partial last line in {path}")
+                    break
+                out.write(line)
+                add_record_id(seen_ids, line, path)
+        except zstd.ZstdError as e:
+            logger.warning(f"Stopped reading {path} at undecodable data: {e}")
+    os.replace(tmp_path, path)
+    return seen_ids
+
+
+async def fetch_post(
+    post, semaphore: asyncio.Semaphore, top_comments: int
+) -> Dict[str, Any]:
+    """Build the output record for one submission; comment fetches share the semaphore."""
+    async with semaphore:
+        # Basic submission fields
+        try:
+            values = get_post_fields(post)
+        except AttributeError:
+            # id and title are required; the optional ones fall back to defaults
+            values = (
+                post.id,
+                post.title,
+                getattr(post, "selftext", ""),
+                getattr(post, "score", None),
+                getattr(post, "created_utc", None),
+                getattr(post, "num_comments", None),
+                getattr(post, "permalink", None),
+            )
+        post_data = dict(zip(POST_FIELDS, values))
+        post_data["title"] = redact_title(post_data["title"])
+        post_data["selftext"] = redact_text(post_data["selftext"])
+
+        top_comments_list = await extract_top_comments(post, top_n=top_comments)
+        post_data["top_comments"] = top_comments_list
+    return post_data
+
+
+async def scrape_subreddit(
     # these defaults are for defensive purposes, real defaults are defined at parser argument instantiation
     subreddit_name: str,
     sort: str = "top",
@@ -105,103 +324,196 @@ def scrape_subreddit(
     limit: int = 250,
     top_comments: int = 10,
     output_prefix: str = "soccercirclejerk",
+    concurrency: int = 8,
+    resume: bool = True,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    compress: bool = False,
+    reddit_kwargs: Optional[Dict[str, Any]] = None,
 ) -> None:
-    reddit_scraper = init_reddit_creds()
-    logger.info(
-        f"Scraping r/{subreddit_name} | sort={sort} time={time_filter} limit={limit} top_comments={top_comments}"
-    )
-    sub = reddit_scraper.subreddit(subreddit_name)
+    async with init_reddit_creds(**(reddit_kwargs or {})) as reddit_scraper:
+        await _scrape_subreddit(
+            reddit_scraper,
+            subreddit_name,
+            sort=sort,
+            time_filter=time_filter,
+            limit=limit,
+            top_comments=top_comments,
+            output_prefix=output_prefix,
+            concurrency=concurrency,
+            resume=resume,
+            after=after,
+            before=before,
+            compress=compress,
+        )
 
-    submissions = []
-    # Choose generator based on sort
+
+async def _scrape_subreddit(
+    reddit_scraper,
+    subreddit_name: str,
+    sort: str,
+    time_filter: str,
+    limit: int,
+    top_comments: int,
+    output_prefix: str,
+    concurrency: int,
+    resume: bool,
+    after: Optional[int],
+    before: Optional[int],
+    compress: bool,
+) -> None:
     iteratable_results = None
-    sort = sort.lower()
-    if sort == "top":
-        iteratable_results = sub.top(time_filter=time_filter, limit=limit)
-    elif sort == "hot":
-        iteratable_results = sub.hot(limit=limit)
-    elif sort == "new":
-        iteratable_results = sub.new(limit=limit)
-    elif sort == "rising":
-        iteratable_results = sub.rising(limit=limit)
+    if after is not None:
+        # date range: ids come from the PullPush archive, which (unlike reddit's
+        # listings) can be queried by creation time and isn't capped at ~1000 posts
+        logger.info(
+            f"Scraping r/{subreddit_name} | after={after} before={before} limit={limit} top_comments={top_comments} concurrency={concurrency}"
+        )
+        ids = await pushshift.fetch_submission_ids(
+            subreddit_name, after=after, before=before, limit=limit
+        )
+        # live fields still come from reddit, 100 submissions per /api/info request
+        iteratable_results = reddit_scraper.info(fullnames=[f"t3_{i}" for i in ids])
+        out_stem = f"{output_prefix}_{subreddit_name}_range_{format_day(after)}_{format_day(before)}_{limit}"
     else:
-        logger.warning(f"Unknown sort '{sort}', defaulting to top")
-        iteratable_results = sub.top(time_filter=time_filter, limit=limit)
-
-    out_jsonl = f"{output_prefix}_{subreddit_name}_{sort}_{time_filter}_{limit}.jsonl"
-    out_csv = f"{output_prefix}_{subreddit_name}_{sort}_{time_filter}_{limit}.csv"
-
-    jsonl_f = open(out_jsonl, "w", encoding="utf-8")
-    rows = []
+        logger.info(
+            f"Scraping r/{subreddit_name} | sort={sort} time={time_filter} limit={limit} top_comments={top_comments} concurrency={concurrency}"
+        )
+        sub = await reddit_scraper.subreddit(subreddit_name)
+
+        # Choose generator based on sort
+        sort = sort.lower()
+        if sort == "top":
+            iteratable_results = sub.top(time_filter=time_filter, limit=limit)
+        elif sort == "hot":
+            iteratable_results = sub.hot(limit=limit)
+        elif sort == "new":
+            iteratable_results = sub.new(limit=limit)
+        elif sort == "rising":
+            iteratable_results = sub.rising(limit=limit)
+        else:
+            logger.warning(f"Unknown sort '{sort}', defaulting to top")
+            iteratable_results = sub.top(time_filter=time_filter, limit=limit)
+        out_stem = f"{output_prefix}_{subreddit_name}_{sort}_{time_filter}_{limit}"
+
+    # the CSV is named after its JSONL variant: resume state is read from the JSONL, so
+    # a shared CSV would be overwritten when --zstd is toggled between runs
+    if compress:
+        out_jsonl = f"{out_stem}.jsonl.zst"
+        out_csv = f"{out_stem}.zstd.csv"
+    else:
+        out_jsonl = f"{out_stem}.jsonl"
+        out_csv = f"{out_stem}.csv"
+
+    # the listing itself is cheap (100 submissions per request), drain it first.
+    # Listing items already carry every submission field fetch_post reads (Async PRAW
+    # never lazy-fetches), so the only per-post request is the comment load.
+    submissions = [post async for post in iteratable_results]
+
+    # resume: posts already in the JSONL output from an earlier run are not fetched again
+    seen_ids = set()
+    if resume and os.path.exists(out_jsonl):
+        seen_ids = load_seen_ids(out_jsonl)
+    skipped = 0
+    if seen_ids:
+        total = len(submissions)
+        submissions = [post for post in submissions if post.id not in seen_ids]
+        skipped = total - len(submissions)
+        logger.info(
+            f"Resuming {out_jsonl}: skipping {skipped} already scraped submissions"
+        )
 
-    count = 0
-    for post in tqdm(
-        iteratable_results, total=limit if isinstance(limit, int) else None
-    ):
-        try:
-            # Basic submission fields
-            post_data = {
-                "id": post.id,
-                "title": redact_text(post.title),
-                "selftext": redact_text(getattr(post, "selftext", "")),
-                "score": getattr(post, "score", None),
-                "created_utc": getattr(post, "created_utc", None),
-                "num_comments": getattr(post, "num_comments", None),
-                "permalink": getattr(post, "permalink", None),
-            }
+    # schedule every comment fetch up front; the semaphore caps how many are in flight
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        asyncio.ensure_future(fetch_post(post, semaphore, top_comments))
+        for post in submissions
+    ]
 
-            top_comments_list = extract_top_comments(post, top_n=top_comments)
-            post_data["top_comments"] = top_comments_list
+    # output_prefix may point into a directory that doesn't exist yet
+    out_dir = os.path.dirname(out_jsonl)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
 
-            if post_data["title"] != "":
-                # write to jsonl
-                jsonl_f.write(json.dumps(post_data, ensure_ascii=False) + "\n")
+    # when resuming, append to both outputs; the CSV header is only written once
+    append = bool(seen_ids)
+    write_csv_header = not (append and os.path.exists(out_csv))
 
-                # For CSV row: flatten comments into a single string separated by " ||| "
-                comments_flat = " ||| ".join(
-                    [
-                        c["body"].replace("\n", "").replace("\r", "")
-                        for c in top_comments_list
-                    ]
-                )
-                rows.append(
-                    {
-                        "id": post_data["id"],
-                        "title": post_data["title"],
-                        "selftext": post_data["selftext"]
-                        .replace("\n", "")
-                        .replace("\r", ""),
-                        "top_comments": comments_flat,
-                        "score": post_data["score"],
-                        "num_comments": post_data["num_comments"],
-                        "created_utc": post_data["created_utc"],
-                        "permalink": post_data["permalink"],
-                    }
+    count = 0
+    # orjson emits utf-8 bytes directly, so the JSONL file is opened in binary mode.
+    # CSV rows are streamed alongside the JSONL ones instead of being collected first.
+    with open_jsonl_writer(out_jsonl, append=append) as jsonl_f, open(
+        out_csv, "a" if append else "w", newline="", encoding="utf-8"
+    ) as csv_f:
+        csv_writer = csv.writer(csv_f)
+        if write_csv_header:
+            csv_writer.writerow(CSV_FIELDS)
+
+        # await in listing order so output order matches the subreddit's ranking;
+        # progress bar redraws at most once a second
+        for post, task in tqdm(
+            zip(submissions, tasks), total=len(tasks), mininterval=1.0, smoothing=0
+        ):
+            try:
+                post_data = await task
+                top_comments_list = post_data["top_comments"]
+
+                if post_data["title"] != "":
+                    # write to jsonl
+                    jsonl_f.write(
+                        orjson.dumps(post_data, option=orjson.OPT_APPEND_NEWLINE)
+                    )
+
+                    # For CSV row: flatten comments into a single string separated by " ||| "
+                    comments_flat = " ||| ".join(
+                        c["body"].translate(STRIP_NEWLINES) for c in top_comments_list
+                    )
+                    csv_writer.writerow(
+                        (
+                            post_data["id"],
+                            post_data["title"],
+                            post_data["selftext"].translate(STRIP_NEWLINES),
+                            comments_flat,
+                            post_data["score"],
+                            post_data["num_comments"],
+                            post_data["created_utc"],
+                            post_data["permalink"],
+                        )
+                    )
+                    # flush each record (binary files can't be line-buffered) so a crash
+                    # mid-run keeps everything scraped so far; for zstd this ends a block
+                    jsonl_f.flush()
+                    csv_f.flush()
+
+                    count += 1
+            except Exception as e:
+                logger.exception(
+                    f"Error processing submission id={getattr(post, 'id', None)}: {e}"
                 )
+                # continue to next submission
 
-                count += 1
-                # small sleep to be polite and avoid bursts; PRAW handles rate-limits but does this help????
-                # time.sleep(0.1)
-        except Exception as e:
-            jsonl_f.close()
+    logger.info(
+        f"Saved {count} submissions to {out_jsonl} and {out_csv} ({skipped} already there)"
+    )
 
-            logger.exception(
-                f"Error processing submission id={getattr(post, 'id', None)}: {e}"
-            )
-            # continue to next submission
 
-    jsonl_f.close()
+def parse_day(value: str) -> int:
+    """argparse type: YYYY-MM-DD (UTC) -> epoch seconds."""
+    day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return int(day.timestamp())
+
 
-    # Save CSV
-    df = pd.DataFrame(rows)
-    df.to_csv(out_csv, index=False)
-    logger.info(f"Saved {count} submissions to {out_jsonl} and {out_csv}")
+def format_day(timestamp: Optional[int]) -> str:
+    """Epoch seconds -> YYYYMMDD for output filenames; None means 'now'."""
+    if timestamp is None:
+        return "now"
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y%m%d")
 
 
-def main():
+async def main():
     # -h / --help text
     parser = argparse.ArgumentParser(
-        description="Scrape subreddit submissions + top comments (PRAW)."
+        description="Scrape subreddit submissions + top comments (Async PRAW)."
     )
     parser.add_argument(
         "--subreddit", "-s", default="soccercirclejerk", help="Subreddit name (no r/)"
@@ -236,16 +548,51 @@ def main():
     parser.add_argument(
         "--output_prefix", "-o", default="dataset", help="Output filename prefix"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Max submissions whose comments are fetched at the same time",
+    )
+    parser.add_argument(
+        "--no_resume",
+        action="store_true",
+        help="Overwrite existing output instead of skipping submissions already in it",
+    )
+    parser.add_argument(
+        "--after",
+        type=parse_day,
+        default=None,
+        help="YYYY-MM-DD; scrape submissions created after this day via PullPush instead of --sort/--time",
+    )
+    parser.add_argument(
+        "--before",
+        type=parse_day,
+        default=None,
+        help="YYYY-MM-DD upper bound for --after (default: now)",
+    )
+    parser.add_argument(
+        "--zstd",
+        action="store_true",
+        help="Write the JSONL output zstd-compressed (.jsonl.zst)",
+    )
     args = parser.parse_args()
+    if args.before is not None and args.after is None:
+        parser.error("--before requires --after")
 
     try:
-        scrape_subreddit(
+        await scrape_subreddit(
             subreddit_name=args.subreddit,
             limit=args.limit,
             sort=args.sort,
             time_filter=args.time,
             top_comments=args.top_comments,
             output_prefix=args.output_prefix,
+            concurrency=args.concurrency,
+            resume=not args.no_resume,
+            after=args.after,
+            before=args.before,
+            compress=args.zstd,
         )
     except Exception as e:
         logger.exception(f"Fatal error: {e}")
@@ -253,4 +600,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())